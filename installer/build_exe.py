@@ -8,8 +8,27 @@ import os
 import sys
 import subprocess
 import shutil
+import zipfile
+import ctypes
+from collections import deque
 from pathlib import Path
 
+# Stdlib packages the installer/uninstaller never import; keeping them out of
+# the PYZ shrinks the exes and shortens unpacking at startup
+EXCLUDED_MODULES = [
+    "asyncio", "unittest", "xml", "email", "http", "pydoc", "logging.config",
+    "tkinter", "test", "distutils", "setuptools", "pkg_resources",
+    "ssl", "hashlib", "bz2", "lzma", "_ssl"
+]
+
+INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+
+def _fast_exists(p):
+    """Cheap existence probe via GetFileAttributesW (no stat_result allocation)"""
+    attributes = ctypes.windll.kernel32.GetFileAttributesW(str(p))
+    # The default c_int restype turns the DWORD 0xFFFFFFFF into -1, so mask it back
+    return (attributes & 0xFFFFFFFF) != INVALID_FILE_ATTRIBUTES
+
 def check_pyinstaller():
     """Check if PyInstaller is available"""
     try:
@@ -28,7 +47,7 @@ def install_pyinstaller():
         return False
 
 def prepare_installer_resources():
-    """Prepare resources for installer"""
+    """Locate resources for installer, returning the resolved ruping.exe path"""
     # Find ruping.exe
     ruping_exe_path = None
     possible_paths = [
@@ -38,34 +57,67 @@ def prepare_installer_resources():
     ]
 
     for path in possible_paths:
-        if path.exists():
+        if _fast_exists(path):
             ruping_exe_path = path.resolve()
             break
 
     if not ruping_exe_path:
         print("ERROR: ruping.exe not found. Please build it first with 'cargo build --release'")
-        return False
+        return None
 
     print(f"Found ruping.exe at: {ruping_exe_path}")
+    return ruping_exe_path
 
-    # Copy ruping.exe to installer directory for embedding
-    shutil.copy2(ruping_exe_path, "ruping.exe")
-    print("Copied ruping.exe to installer directory")
+def build_payload(ruping_exe_path, uninstaller_exe_path, payload_path):
+    """Bundle the binaries the installer deploys into a single payload.zip"""
+    try:
+        # ZIP_STORED: the exes don't compress well and extraction stays a plain copy
+        with zipfile.ZipFile(payload_path, "w", zipfile.ZIP_STORED) as zf:
+            zf.write(ruping_exe_path, "ruping.exe")
+            zf.write(uninstaller_exe_path, "ruping-uninstaller.exe")
+        print(f"Built payload: {Path(payload_path).resolve()}")
+        return True
+    except Exception as e:
+        print(f"Failed to build payload: {e}")
+        return False
 
-    return True
+def package_installer(dist_dir):
+    """Zip the onedir installer distribution into ruping-installer.zip"""
+    try:
+        archive = shutil.make_archive(
+            str(dist_dir),
+            "zip",
+            root_dir=dist_dir.parent,
+            base_dir=dist_dir.name
+        )
+        print(f"Packaged installer: {Path(archive).resolve()}")
+        return True
+    except Exception as e:
+        print(f"Failed to package installer: {e}")
+        return False
 
-def build_exe(script_path, output_name, icon_path=None, add_data=None):
+def build_exe(script_path, output_name, icon_path=None, add_data=None, onedir=False):
     """Build exe using PyInstaller"""
     cmd = [
         sys.executable, "-m", "PyInstaller",
-        "--onefile",
         "--console",
+        "--noconfirm",  # Output is piped, so PyInstaller can't ask before replacing a previous onedir build
+        "--noupx",  # Never pick up UPX implicitly from PATH
         "--name", output_name,
         "--distpath", "../release",  # Output to release directory
         "--workpath", "build",
         "--specpath", "build"
     ]
 
+    for module in EXCLUDED_MODULES:
+        cmd.extend(["--exclude-module", module])
+
+    if onedir:
+        # No per-run extraction to %TEMP%; support files live in <dist>/lib
+        cmd.extend(["--onedir", "--contents-directory", "lib"])
+    else:
+        cmd.append("--onefile")
+
     if icon_path and Path(icon_path).exists():
         cmd.extend(["--icon", icon_path])
 
@@ -81,16 +133,26 @@ def build_exe(script_path, output_name, icon_path=None, add_data=None):
     print(f"Building {output_name}.exe...")
     print(f"Command: {' '.join(cmd)}")
 
+    # Stream PyInstaller output as it arrives, keeping only the tail for error context
+    tail = deque(maxlen=50)
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print(f"Successfully built {output_name}.exe")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to build {output_name}.exe:")
-        print(e.stdout)
-        print(e.stderr)
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, bufsize=1) as proc:
+            for line in proc.stdout:
+                print(line, end="")
+                tail.append(line)
+    except OSError as e:
+        print(f"Failed to build {output_name}.exe: {e}")
         return False
 
+    if proc.returncode != 0:
+        print(f"Failed to build {output_name}.exe (exit code {proc.returncode}):")
+        print("".join(tail), end="")
+        return False
+
+    print(f"Successfully built {output_name}.exe")
+    return True
+
 def main():
     print("RuPing Installer/Uninstaller EXE Builder")
     print("=========================================")
@@ -107,8 +169,9 @@ def main():
     installer_dir = Path(__file__).parent
     os.chdir(installer_dir)
 
-    # Prepare resources
-    if not prepare_installer_resources():
+    # Prepare resources (fail fast, before running PyInstaller)
+    ruping_exe_path = prepare_installer_resources()
+    if not ruping_exe_path:
         return False
 
     # Clean previous builds
@@ -130,9 +193,8 @@ def main():
         print("ERROR: Failed to build uninstaller")
         return False
 
-    # Verify files exist before adding them
-    ruping_exe_path = Path("ruping.exe")
-    uninstaller_exe_path = Path("../release/ruping-uninstaller.exe")
+    # Verify files exist before packaging them
+    uninstaller_exe_path = Path("../release/ruping-uninstaller.exe").resolve()
 
     if not ruping_exe_path.exists():
         print(f"ERROR: {ruping_exe_path} not found")
@@ -142,28 +204,20 @@ def main():
         print(f"ERROR: {uninstaller_exe_path} not found")
         return False
 
-    print(f"Found ruping.exe: {ruping_exe_path.resolve()}")
-    print(f"Found ruping-uninstaller.exe: {uninstaller_exe_path.resolve()}")
-
-    # Copy uninstaller.exe to installer directory for embedding
-    local_uninstaller_path = Path("ruping-uninstaller.exe")
-    shutil.copy2(uninstaller_exe_path, local_uninstaller_path)
-    print(f"Copied uninstaller to: {local_uninstaller_path.resolve()}")
+    print(f"Found ruping.exe: {ruping_exe_path}")
+    print(f"Found ruping-uninstaller.exe: {uninstaller_exe_path}")
 
-    installer_data = [
-        (str(ruping_exe_path.resolve()), "."),
-        (str(local_uninstaller_path.resolve()), ".")
-    ]
-
-    if not build_exe("installer.py", "ruping-installer", add_data=installer_data):
+    if not build_exe("installer.py", "ruping-installer", onedir=True):
         success = False
+    else:
+        installer_dist_dir = release_dir / "ruping-installer"
 
-    # Clean up temporary files
-    temp_files = ["ruping.exe", "ruping-uninstaller.exe"]
-    for temp_file in temp_files:
-        if Path(temp_file).exists():
-            Path(temp_file).unlink()
-            print(f"Cleaned temporary file: {temp_file}")
+        # Build the payload from the original artefacts straight into the
+        # dist directory, next to ruping-installer.exe
+        if not build_payload(ruping_exe_path, uninstaller_exe_path, installer_dist_dir / "payload.zip"):
+            success = False
+        elif not package_installer(installer_dist_dir):
+            success = False
 
     if success:
         print()
@@ -174,15 +228,18 @@ def main():
         if release_dir.exists():
             for exe_file in release_dir.glob("*.exe"):
                 print(f"  {exe_file}")
+            for zip_file in release_dir.glob("*.zip"):
+                print(f"  {zip_file}")
 
         print()
         print("Usage:")
+        print("  (extract ruping-installer.zip first)")
         print("  ruping-installer.exe --help")
         print("  ruping-installer.exe --install-path \"C:\\MyTools\\RuPing\"")
         print("  ruping-uninstaller.exe --help")
         print("  ruping-uninstaller.exe --silent")
         print()
-        print("The installer includes:")
+        print("The installer package includes:")
         print("  - ruping.exe (main program)")
         print("  - ruping-uninstaller.exe (compiled uninstaller)")
         print("  - Command aliases (ruping.cmd, rustping.cmd, rping.cmd)")
@@ -6,24 +6,42 @@ A self-contained installer that includes all necessary files
 
 import os
 import sys
+import time
 import shutil
 import argparse
+import functools
 import json
-import subprocess
-import winreg
+import zipfile
 from pathlib import Path
 import ctypes
-import base64
-import tempfile
-
-# Embedded files (will be populated by build script)
-EMBEDDED_FILES = {
-    'ruping.exe': '',
-    'uninstaller.py': '',
-    'ruping.cmd': '@echo off\n"%~dp0ruping.exe" %*\n',
-    'rustping.cmd': '@echo off\n"%~dp0ruping.exe" %*\n',
-    'rping.cmd': '@echo off\n"%~dp0ruping.exe" %*\n'
-}
+
+# Alias launcher written for every alias (CRLF line endings for cmd.exe)
+ALIAS_CMD_BODY = b'@echo off\r\n"%~dp0ruping.exe" %*\r\n'
+
+INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+PATH_UPDATE_RETRIES = 3
+
+def _fast_exists(p):
+    """Cheap existence probe via GetFileAttributesW (no stat_result allocation)"""
+    attributes = ctypes.windll.kernel32.GetFileAttributesW(str(p))
+    # The default c_int restype turns the DWORD 0xFFFFFFFF into -1, so mask it back
+    return (attributes & 0xFFFFFFFF) != INVALID_FILE_ATTRIBUTES
+
+# Payload directory of a PyInstaller build, resolved once (None when running from source).
+# onedir build: payload files sit next to the installer exe
+_BUNDLE_DIR = Path(sys.executable).parent if hasattr(sys, '_MEIPASS') else None
+
+@functools.lru_cache(maxsize=1)
+def _bundle_index():
+    """Map payload file names to paths with a single scandir of the bundle directory"""
+    if _BUNDLE_DIR is None:
+        return {}
+    try:
+        # Flat directory, no recursion needed
+        with os.scandir(_BUNDLE_DIR) as it:
+            return {entry.name: Path(entry.path) for entry in it if entry.is_file()}
+    except OSError:
+        return {}
 
 class RuPingStandaloneInstaller:
     def __init__(self):
@@ -49,40 +67,41 @@ class RuPingStandaloneInstaller:
     
     def list_bundle_contents(self, debug=False):
         """List all files in PyInstaller bundle for debugging"""
-        if debug and hasattr(sys, '_MEIPASS'):
-            bundle_dir = Path(sys._MEIPASS)
-            print(f"PyInstaller bundle directory: {bundle_dir}")
-            if bundle_dir.exists():
-                print("Bundle contents:")
-                for item in bundle_dir.rglob("*"):
-                    if item.is_file():
-                        size_mb = item.stat().st_size / (1024 * 1024)
-                        print(f"  {item.relative_to(bundle_dir)} ({size_mb:.2f} MB)")
-            else:
+        if debug and _BUNDLE_DIR is not None:
+            print(f"PyInstaller bundle directory: {_BUNDLE_DIR}")
+            try:
+                # The payload directory is flat, a single scandir is enough
+                with os.scandir(_BUNDLE_DIR) as it:
+                    print("Bundle contents:")
+                    for entry in it:
+                        if entry.is_file():
+                            size_mb = entry.stat().st_size / (1024 * 1024)
+                            print(f"  {entry.name} ({size_mb:.2f} MB)")
+            except FileNotFoundError:
                 print("Bundle directory does not exist!")
         elif debug:
             print("Not running from PyInstaller bundle")
 
-    def extract_embedded_file(self, filename, target_path, debug=False):
+    def extract_embedded_file(self, filename, target_path, debug=False, make_dirs=True):
         """Extract embedded file to target path"""
         if debug:
             print(f"\n=== Extracting {filename} ===")
             print(f"Target path: {target_path}")
-            # Debug: List bundle contents first
-            self.list_bundle_contents(debug=True)
 
         # First try to extract from PyInstaller bundle
-        if hasattr(sys, '_MEIPASS'):
-            bundle_dir = Path(sys._MEIPASS)
-            bundled_path = bundle_dir / filename
+        if _BUNDLE_DIR is not None:
+            bundled_path = _bundle_index().get(filename)
 
-            if bundled_path.exists():
+            if bundled_path is not None:
                 try:
                     if debug:
                         print(f"Found bundled file! Size: {bundled_path.stat().st_size} bytes")
                     # Ensure target directory exists
-                    Path(target_path).parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(bundled_path, target_path)
+                    if make_dirs:
+                        Path(target_path).parent.mkdir(parents=True, exist_ok=True)
+                    # Let the OS copy the file instead of a Python read/write loop
+                    if not ctypes.windll.kernel32.CopyFileW(str(bundled_path), str(target_path), False):
+                        raise ctypes.WinError()
 
                     # Verify the copy
                     if Path(target_path).exists():
@@ -97,114 +116,109 @@ class RuPingStandaloneInstaller:
 
                 except Exception as e:
                     if debug:
-                        print(f"❌ Failed to copy {filename} from bundle: {e}")
-                        import traceback
-                        traceback.print_exc()
+                        print(f"❌ Failed to copy {filename} from bundle: {type(e).__name__}: {e}")
                     return False
             else:
                 if debug:
-                    print(f"❌ Bundled file not found at {bundled_path}")
+                    print(f"❌ Bundled file not found: {filename}")
 
-        # Fallback to embedded content (for standalone script)
+        # Fallback to local files (for standalone script)
         if debug:
             print(f"Trying fallback methods for {filename}...")
 
-        if filename not in EMBEDDED_FILES:
-            # Try to find file locally
-            local_paths = [
-                Path(filename),
-                Path("../target/release") / filename if filename.endswith('.exe') else Path(filename),
-                Path(__file__).parent / filename,
-                Path(__file__).parent.parent / "target" / "release" / filename if filename.endswith('.exe') else Path(filename)
-            ]
-
-            for local_path in local_paths:
-                if local_path.exists():
-                    try:
-                        if debug:
-                            print(f"Found local file! Size: {local_path.stat().st_size} bytes")
-                        Path(target_path).parent.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(local_path, target_path)
-                        if debug:
-                            print(f"✅ Successfully copied {filename} from {local_path}")
-                        return True
-                    except Exception as e:
-                        if debug:
-                            print(f"❌ Failed to copy {filename} from {local_path}: {e}")
-                        continue
-
-            if debug:
-                print(f"❌ Could not find {filename} in any local path")
-            return False
+        local_paths = [
+            Path(filename),
+            Path("../target/release") / filename if filename.endswith('.exe') else Path(filename),
+            Path(__file__).parent / filename,
+            Path(__file__).parent.parent / "target" / "release" / filename if filename.endswith('.exe') else Path(filename)
+        ]
 
-        # Try embedded content
-        content = EMBEDDED_FILES[filename]
-        if not content:
-            if debug:
-                print(f"❌ No content for {filename} in EMBEDDED_FILES")
-            return False
+        for local_path in local_paths:
+            if _fast_exists(local_path):
+                try:
+                    if debug:
+                        print(f"Found local file! Size: {local_path.stat().st_size} bytes")
+                    if make_dirs:
+                        Path(target_path).parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(local_path, target_path)
+                    if debug:
+                        print(f"✅ Successfully copied {filename} from {local_path}")
+                    return True
+                except Exception as e:
+                    if debug:
+                        print(f"❌ Failed to copy {filename} from {local_path}: {e}")
+                    continue
 
-        try:
-            if debug:
-                print(f"Extracting {filename} from embedded content...")
-            Path(target_path).parent.mkdir(parents=True, exist_ok=True)
-
-            if filename.endswith('.exe'):
-                # Binary file - decode from base64
-                with open(target_path, 'wb') as f:
-                    f.write(base64.b64decode(content))
-            else:
-                # Text file
-                with open(target_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-            if debug:
-                print(f"✅ Successfully extracted {filename} from embedded content")
-            return True
-        except Exception as e:
-            if debug:
-                print(f"❌ Failed to extract {filename}: {e}")
-                import traceback
-                traceback.print_exc()
-            return False
+        if debug:
+            print(f"❌ Could not find {filename} in any local path")
+        return False
     
     def add_to_path(self, path_to_add):
         """Add directory to system PATH"""
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
-                              r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment",
-                              0, winreg.KEY_ALL_ACCESS) as key:
-                current_path, _ = winreg.QueryValueEx(key, "PATH")
-                
-                if str(path_to_add) not in current_path:
-                    new_path = f"{current_path};{path_to_add}"
-                    winreg.SetValueEx(key, "PATH", 0, winreg.REG_EXPAND_SZ, new_path)
-                    
-                    # Broadcast environment change (avoid hang using timeout)
-                    HWND_BROADCAST = 0xFFFF
-                    WM_SETTINGCHANGE = 0x001A
-                    SMTO_ABORTIFHUNG = 0x0002
-                    try:
-                        result = ctypes.c_ulong()
-                        ctypes.windll.user32.SendMessageTimeoutW(
-                            HWND_BROADCAST,
-                            WM_SETTINGCHANGE,
-                            0,
-                            ctypes.c_wchar_p("Environment"),
-                            SMTO_ABORTIFHUNG,
-                            3000,
-                            ctypes.byref(result),
-                        )
-                    except Exception as e:
-                        print(f"Warning: Failed to broadcast environment change (non-fatal): {e}")
-                    
-                    print(f"Added {path_to_add} to system PATH")
-                    return True
-                else:
-                    print(f"{path_to_add} is already in system PATH")
+        import winreg  # Only needed for PATH edits
+
+        # Query/set only; KEY_ALL_ACCESS asks for far more than a PATH edit needs
+        access = winreg.KEY_QUERY_VALUE | winreg.KEY_SET_VALUE | winreg.KEY_WOW64_64KEY
+        for attempt in range(PATH_UPDATE_RETRIES):
+            try:
+                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
+                                  r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment",
+                                  0, access) as key:
+                    current_path, _ = winreg.QueryValueEx(key, "PATH")
+
+                    # De-duplicate entries case-insensitively so reinstalls don't grow PATH
+                    seen = set()
+                    paths = []
+                    for p in current_path.split(';'):
+                        if not p:
+                            continue
+                        normalized = os.path.normcase(os.path.normpath(p))
+                        if normalized in seen:
+                            continue
+                        seen.add(normalized)
+                        paths.append(p)
+
+                    already_present = os.path.normcase(os.path.normpath(str(path_to_add))) in seen
+                    if not already_present:
+                        paths.append(str(path_to_add))
+                    new_path = ';'.join(paths)
+
+                    if new_path != current_path:
+                        winreg.SetValueEx(key, "PATH", 0, winreg.REG_EXPAND_SZ, new_path)
+
+                        # Broadcast environment change (avoid hang using timeout)
+                        HWND_BROADCAST = 0xFFFF
+                        WM_SETTINGCHANGE = 0x001A
+                        SMTO_ABORTIFHUNG = 0x0002
+                        try:
+                            result = ctypes.c_ulong()
+                            ctypes.windll.user32.SendMessageTimeoutW(
+                                HWND_BROADCAST,
+                                WM_SETTINGCHANGE,
+                                0,
+                                ctypes.c_wchar_p("Environment"),
+                                SMTO_ABORTIFHUNG,
+                                3000,
+                                ctypes.byref(result),
+                            )
+                        except Exception as e:
+                            print(f"Warning: Failed to broadcast environment change (non-fatal): {e}")
+
+                    if already_present:
+                        print(f"{path_to_add} is already in system PATH")
+                    else:
+                        print(f"Added {path_to_add} to system PATH")
                     return True
-        except Exception as e:
-            print(f"Failed to add to PATH: {e}")
-            return False
+            except PermissionError as e:
+                # Access can be denied transiently (e.g. AV scanners holding the key)
+                if attempt < PATH_UPDATE_RETRIES - 1:
+                    time.sleep(0.1 * (attempt + 1))
+                    continue
+                print(f"Failed to add to PATH: {e}")
+                return False
+            except Exception as e:
+                print(f"Failed to add to PATH: {e}")
+                return False
     
     def create_start_menu_shortcut(self, install_dir):
         """Create start menu shortcut"""
@@ -248,7 +262,39 @@ IconIndex=0
         except Exception as e:
             print(f"Warning: Failed to save installation info: {e}")
     
-    def install(self, install_path=None, no_path=False, silent=False):
+    def extract_payload(self, target_dir, silent=False):
+        """Extract all payload files into target_dir, returning their names or None on failure"""
+        payload_zip = _bundle_index().get("payload.zip")
+        if payload_zip is not None:
+            # Built installer: everything ships in one archive, extract it in one pass
+            try:
+                with zipfile.ZipFile(payload_zip) as zf:
+                    zf.extractall(target_dir)
+                    extracted = zf.namelist()
+            except Exception as e:
+                print(f"ERROR: Failed to extract payload: {e}")
+                return None
+            if not silent:
+                for filename in extracted:
+                    print(f"Extracted: {filename}")
+            return extracted
+
+        # Extract all embedded files
+        files_to_extract = [self.exe_name, "ruping-uninstaller.exe"]
+
+        # Enable debug mode for detailed output (can be disabled for production)
+        debug_mode = not silent
+
+        for filename in files_to_extract:
+            # target_dir is created by the caller, skip the per-file mkdir
+            if not self.extract_embedded_file(filename, target_dir / filename, debug=debug_mode, make_dirs=False):
+                print(f"ERROR: Failed to extract {filename}")
+                return None
+            if not silent:
+                print(f"Extracted: {filename}")
+        return files_to_extract
+
+    def install(self, install_path=None, no_path=False, silent=False, debug_bundle=False):
         """Install RuPing"""
         self.require_admin()
         
@@ -256,6 +302,9 @@ IconIndex=0
             print("RuPing Standalone Installer")
             print("===========================")
             print()
+
+        if debug_bundle:
+            self.list_bundle_contents(debug=True)
         
         # Determine installation directory
         if install_path:
@@ -273,25 +322,42 @@ IconIndex=0
             print(f"ERROR: Failed to create installation directory: {e}")
             return False
         
-        # Extract all embedded files
-        files_to_extract = [
-            (self.exe_name, install_dir / self.exe_name),
-            ("ruping-uninstaller.exe", install_dir / "ruping-uninstaller.exe")
-        ]
+        # Stage files first so a failed install never leaves a half-populated directory
+        staging_dir = install_dir / ".staging"
+        try:
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir)
+            staging_dir.mkdir()
+        except Exception as e:
+            print(f"ERROR: Failed to create staging directory: {e}")
+            return False
 
-        # Add alias files
-        for alias in self.aliases:
-            files_to_extract.append((f"{alias}.cmd", install_dir / f"{alias}.cmd"))
+        # Alias launchers are tiny and identical, write them directly
+        staged_files = []
+        try:
+            for alias in self.aliases:
+                (staging_dir / f"{alias}.cmd").write_bytes(ALIAS_CMD_BODY)
+                staged_files.append(f"{alias}.cmd")
+        except Exception as e:
+            print(f"ERROR: Failed to write command aliases: {e}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return False
 
-        # Enable debug mode for detailed output (can be disabled for production)
-        debug_mode = not silent
+        payload_files = self.extract_payload(staging_dir, silent=silent)
+        if payload_files is None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return False
+        staged_files.extend(payload_files)
 
-        for filename, target_path in files_to_extract:
-            if not self.extract_embedded_file(filename, target_path, debug=debug_mode):
-                print(f"ERROR: Failed to extract {filename}")
-                return False
-            if not silent:
-                print(f"Extracted: {filename}")
+        # Move staged files into place (same volume, so each rename is atomic)
+        try:
+            for filename in staged_files:
+                os.replace(staging_dir / filename, install_dir / filename)
+            staging_dir.rmdir()
+        except Exception as e:
+            print(f"ERROR: Failed to move files into place: {e}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return False
         
         # Add to PATH
         if not no_path:
@@ -326,6 +392,8 @@ def main():
     parser.add_argument("--install-path", help="Custom installation directory")
     parser.add_argument("--no-path", action="store_true", help="Don't add to system PATH")
     parser.add_argument("--silent", action="store_true", help="Silent installation")
+    parser.add_argument("--debug-bundle", "--verbose-bundle", dest="debug_bundle", action="store_true",
+                        help="List bundled payload files before installing")
     
     args = parser.parse_args()
     
@@ -335,7 +403,8 @@ def main():
         success = installer.install(
             install_path=args.install_path,
             no_path=args.no_path,
-            silent=args.silent
+            silent=args.silent,
+            debug_bundle=args.debug_bundle
         )
         
         if not args.silent:
@@ -6,12 +6,22 @@ Removes RuPing installation and cleans up system changes
 
 import os
 import sys
+import time
 import json
 import shutil
-import winreg
 import ctypes
 from pathlib import Path
 
+INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+FILE_ATTRIBUTE_DIRECTORY = 0x10
+PATH_UPDATE_RETRIES = 3
+
+def _fast_is_file(p):
+    """Cheap file probe via GetFileAttributesW; directories don't count, since uninstall deletes what this finds"""
+    # The default c_int restype turns the DWORD 0xFFFFFFFF into -1, so mask it back
+    attributes = ctypes.windll.kernel32.GetFileAttributesW(str(p)) & 0xFFFFFFFF
+    return attributes != INVALID_FILE_ATTRIBUTES and not attributes & FILE_ATTRIBUTE_DIRECTORY
+
 class RuPingStandaloneUninstaller:
     def __init__(self):
         self.app_name = "RuPing"
@@ -33,42 +43,55 @@ class RuPingStandaloneUninstaller:
     
     def remove_from_path(self, path_to_remove):
         """Remove directory from system PATH"""
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
-                              r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment",
-                              0, winreg.KEY_ALL_ACCESS) as key:
-                current_path, _ = winreg.QueryValueEx(key, "PATH")
-                
-                # Remove all occurrences
-                paths = current_path.split(';')
-                new_paths = [p for p in paths if p != str(path_to_remove)]
-                new_path = ';'.join(new_paths)
-                
-                winreg.SetValueEx(key, "PATH", 0, winreg.REG_EXPAND_SZ, new_path)
-                
-                # Broadcast environment change (avoid hang using timeout)
-                HWND_BROADCAST = 0xFFFF
-                WM_SETTINGCHANGE = 0x001A
-                SMTO_ABORTIFHUNG = 0x0002
-                try:
-                    result = ctypes.c_ulong()
-                    ctypes.windll.user32.SendMessageTimeoutW(
-                        HWND_BROADCAST,
-                        WM_SETTINGCHANGE,
-                        0,
-                        ctypes.c_wchar_p("Environment"),
-                        SMTO_ABORTIFHUNG,
-                        3000,
-                        ctypes.byref(result),
-                    )
-                except Exception as e:
-                    print(f"Warning: Failed to broadcast environment change (non-fatal): {e}")
-                
-                print(f"Removed {path_to_remove} from system PATH")
-                return True
-        except Exception as e:
-            print(f"Failed to remove from PATH: {e}")
-            return False
+        import winreg  # Only needed for PATH edits
+
+        # Query/set only; KEY_ALL_ACCESS asks for far more than a PATH edit needs
+        access = winreg.KEY_QUERY_VALUE | winreg.KEY_SET_VALUE | winreg.KEY_WOW64_64KEY
+        for attempt in range(PATH_UPDATE_RETRIES):
+            try:
+                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
+                                  r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment",
+                                  0, access) as key:
+                    current_path, _ = winreg.QueryValueEx(key, "PATH")
+
+                    # Remove all occurrences, ignoring case and trailing-slash differences
+                    target = os.path.normcase(os.path.normpath(str(path_to_remove)))
+                    paths = current_path.split(';')
+                    new_paths = [p for p in paths if not p or os.path.normcase(os.path.normpath(p)) != target]
+                    new_path = ';'.join(new_paths)
+
+                    winreg.SetValueEx(key, "PATH", 0, winreg.REG_EXPAND_SZ, new_path)
+
+                    # Broadcast environment change (avoid hang using timeout)
+                    HWND_BROADCAST = 0xFFFF
+                    WM_SETTINGCHANGE = 0x001A
+                    SMTO_ABORTIFHUNG = 0x0002
+                    try:
+                        result = ctypes.c_ulong()
+                        ctypes.windll.user32.SendMessageTimeoutW(
+                            HWND_BROADCAST,
+                            WM_SETTINGCHANGE,
+                            0,
+                            ctypes.c_wchar_p("Environment"),
+                            SMTO_ABORTIFHUNG,
+                            3000,
+                            ctypes.byref(result),
+                        )
+                    except Exception as e:
+                        print(f"Warning: Failed to broadcast environment change (non-fatal): {e}")
+
+                    print(f"Removed {path_to_remove} from system PATH")
+                    return True
+            except PermissionError as e:
+                # Access can be denied transiently (e.g. AV scanners holding the key)
+                if attempt < PATH_UPDATE_RETRIES - 1:
+                    time.sleep(0.1 * (attempt + 1))
+                    continue
+                print(f"Failed to remove from PATH: {e}")
+                return False
+            except Exception as e:
+                print(f"Failed to remove from PATH: {e}")
+                return False
     
     def remove_start_menu_shortcut(self):
         """Remove start menu shortcut"""
@@ -103,7 +126,7 @@ class RuPingStandaloneUninstaller:
 
         info_file = current_dir / self.install_info_file
 
-        if info_file.exists():
+        if _fast_is_file(info_file):
             try:
                 with open(info_file, 'r') as f:
                     info = json.load(f)
@@ -111,22 +134,28 @@ class RuPingStandaloneUninstaller:
             except Exception as e:
                 print(f"Warning: Failed to read installation info: {e}")
 
-        # Check if current directory looks like an installation
-        if (current_dir / "ruping.exe").exists():
-            return current_dir, None
-
-        # Try common installation locations
-        possible_paths = [
-            Path(os.environ.get('PROGRAMFILES', 'C:\\Program Files')) / self.app_name,
-            Path(os.environ.get('LOCALAPPDATA', '')) / self.app_name,
-            Path("C:") / self.app_name
-        ]
-
-        for path in possible_paths:
-            if path.exists() and (path / "ruping.exe").exists():
+        # Probe candidates lazily, one check each, stopping at the first hit
+        probed = set()
+        for path in self._candidate_dirs(current_dir):
+            key = os.path.normcase(str(path))
+            if key in probed:
+                continue
+            probed.add(key)
+            # The directory exists iff it holds ruping.exe, for our purposes
+            if _fast_is_file(path / "ruping.exe"):
                 return path, None
 
         return None, None
+
+    def _candidate_dirs(self, current_dir):
+        """Yield possible installation directories in priority order"""
+        # Check if current directory looks like an installation
+        yield current_dir
+
+        # Try common installation locations
+        yield Path(os.environ.get('PROGRAMFILES', 'C:\\Program Files')) / self.app_name
+        yield Path(os.environ.get('LOCALAPPDATA', '')) / self.app_name
+        yield Path("C:") / self.app_name
     
     def uninstall(self, install_path=None, silent=False):
         """Uninstall RuPing"""
@@ -198,7 +227,10 @@ class RuPingStandaloneUninstaller:
         
         # Try to remove installation directory if empty
         try:
-            if not any(install_dir.iterdir()):
+            # A single directory entry is enough to decide
+            with os.scandir(install_dir) as it:
+                empty = next(it, None) is None
+            if empty:
                 install_dir.rmdir()
                 if not silent:
                     print(f"Removed installation directory: {install_dir}")